@@ -17,6 +17,9 @@
 # Libraries used for this application.
 import logging
 import threading
+import concurrent.futures
+import array
+import collections
 
 import curses
 
@@ -41,27 +44,41 @@ pass
 logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d-%m-%Y_%H:%m:%S'))) # Day + time
 # logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d-%m-%Y'))) # Only day
 
-# Defining the colors used by the environment. Each color is matched to an integer, and has its proper object
-# (see the funciont _initializeColors in the FilesManager class)
+# Defining the colors used by the environment. Each color is matched to an integer, used to
+# create the color pairs (see the funciont _initializeColors in the FilesManager class)
 COLORS = {
-	# The indexes of each color, used to create the objects
-	"index" : {
-		"text" : 0,
-		"file" : 0,
-		"dir" : 1,
-		"path" : 3, # Same as alert
-		"alert" : 3
-	},
-	# The objects used to display some text. Defined here for more clarity
-	"curses" : {
-		"text" : None,
-		"file" : None,
-		"dir" : None,
-		"path" : None,
-		"alert" : None
-	}
+	"text" : 0,
+	"file" : 0,
+	"dir" : 1,
+	"path" : 3, # Same as alert
+	"alert" : 3
 }
 
+# The display formats, as plain integers resolved once by _initializeColors.
+# Module globals are cheaper to read in the display loop than nested dict lookups.
+ATTR_TEXT = 0
+ATTR_FILE = 0
+ATTR_DIR = 0 # Pre-OR'd with A_BOLD by _initializeColors
+ATTR_PATH = 0
+ATTR_ALERT = 0
+
+# Layout of a frame-buffer cell : a single integer packing the format in the high
+# bits and the character code in the low bits, for compact, cache-friendly diffing
+CELL_CHAR_BITS = 21
+CELL_CHAR_MASK = (1 << CELL_CHAR_BITS) - 1
+
+# Maximum number of directory listings kept in the cache (see _scanDir)
+DIR_CACHE_SIZE = 32
+
+# The fixed geometry of the screen : header and footer heights
+HEADER_LINES = 2
+FOOTER_LINES = 2
+
+# The footer texts, built once instead of on every frame
+FOOTER_FULL = "[q] Quit    [<] Go out    [>] Go in    [ENTER] Send file"
+FOOTER_SHORT = "[q]    [<]    [>]    [ENTER]"
+FOOTER_FULL_LEN = len(FOOTER_FULL)
+
 
 
 # ===========================================================================================
@@ -78,8 +95,8 @@ class FilesManager(threading.Thread):
 				threadGroup=None,
 				threadTarget=None,
 				threadName=None,
-				threadArgs=list(),
-				threadKwargs=dict(),
+				threadArgs=None,
+				threadKwargs=None,
 				threadDaemon=None,
 				threaded=True,
 				logger=None):
@@ -91,8 +108,10 @@ class FilesManager(threading.Thread):
 			# Use the class as non threaded
 			self.start = self.run
 
-		self._args = threadArgs
-		self._kwargs = threadKwargs
+		# None sentinels instead of mutable defaults : a list()/dict() default is
+		# built once at def-time and shared between every instance
+		self._args = tuple(threadArgs) if threadArgs is not None else ()
+		self._kwargs = threadKwargs if threadKwargs is not None else {}
 
 		# Initialization of the logger
 		if logger:
@@ -103,12 +122,39 @@ class FilesManager(threading.Thread):
 		# Initialization of the values used for the curses environment
 		self._stdscr = None
 		self._currentDir = os.getcwd()
-		self._files = sorted(os.listdir(self._currentDir))
+		self._files = []
+		self._isDir = {} # Caches whether each file of the current directory is a directory
+		self._filePaths = {} # Caches the full path of each file, given for free by scandir
+		self._showHidden = False # Hidden files are skipped at scan time, toggled with 'h'
+
+		# Worker used to scan big (or slow, like network mounts) directories without
+		# freezing the interface. The pending scan is held in _scanFuture
+		self._scanExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+		self._scanFuture = None
+
+		# Small LRU cache of directory listings, keyed by (path, mtime) so a
+		# modified directory is rescanned while revisits come back instantly
+		self._dirCache = collections.OrderedDict()
+
+		self._loadDir()
 		self._selectedIndex = 0
 		self._offset = 0
 		self._availableLines = 0
 		self._chosenFile = None
 
+		# Buffers used for the differential rendering (see _display)
+		# Each buffer is a flat array of width*height packed cells (see CELL_CHAR_BITS) :
+		# contiguous integers diff much faster than per-cell tuples.
+		# The front buffer is the frame currently shown, the back buffer the one being built.
+		# When the front buffer is None, the next frame is fully repainted.
+		self._frontBuffer = None
+		self._backBuffer = None
+		self._bufferWidth = 0
+		self._blankRow = None # A prebuilt row of blank cells, repeated to reset the back buffer
+
+		# Caches the (possibly shortened) path string of the header : (directory, width, text)
+		self._pathCache = None
+
 		self._running = False
 
 
@@ -160,40 +206,82 @@ class FilesManager(threading.Thread):
 		It returns the path to the selected file.
 		"""
 		self._running = True
-		
+
 		# Hide the cursor
 		curses.curs_set(0)
 
+		# Non blocking input, so the key queue can be drained. The timeout caps
+		# the loop around 60 frames per second
+		self._stdscr.timeout(16)
+
+		# Bind the keys compared on every iteration to locals : reading a local is
+		# cheaper than a module attribute lookup per keypress
+		KEY_UP, KEY_DOWN = curses.KEY_UP, curses.KEY_DOWN
+		KEY_LEFT, KEY_RIGHT = curses.KEY_LEFT, curses.KEY_RIGHT
+		KEY_ENTER = curses.KEY_ENTER
+		KEY_RESIZE = curses.KEY_RESIZE
+		KEY_QUIT, KEY_TEST = ord('q'), ord('a')
+		KEY_HIDDEN = ord('h')
+
 		# Display before starting the loop
 		self._display()
 
 		while self._running:
-			# Get the key pressed
+			# Drain all the pending keys before redrawing : a burst of keypresses
+			# (like a held arrow key) produces a single repaint instead of one each
+			dirty = False
 			key = self._stdscr.getch()
-
-			# Actions depending on the key pressed
-			if key == ord('q'): # Quit the program
-				break
-			elif key == ord('a'): # Test
-				self._alert("test")
-			elif key == curses.KEY_UP and self._selectedIndex > 0: # Navigate threw the tree
-				self._selectedIndex -= 1
-				if (self._selectedIndex < self._offset):
-					self._offset -= 1
-			elif key == curses.KEY_DOWN and self._selectedIndex < len(self._files) - 1: # Navigate threw the tree
-				self._selectedIndex += 1
-				if (self._selectedIndex > self._availableLines - 1 + self._offset):
-					self._offset += 1
-			elif key == curses.KEY_LEFT:
-				self._changeDir(os.path.dirname(self._currentDir))
-			elif key == curses.KEY_RIGHT:
-				self._onKeyRight()
-			elif key == curses.KEY_ENTER or key == 10 or key == 13: # ENTER or \n or \r
-				if self._onEnterPress():
-					break
-			# TODO : one key to press to enter the full path with the keyboard
-
-			self._display()
+			while key != -1 and self._running:
+				# Actions depending on the key pressed
+				if key == KEY_QUIT: # Quit the program
+					self._running = False
+				elif key == KEY_TEST: # Test
+					self._alert("test")
+					dirty = True
+				elif key == KEY_UP and self._selectedIndex > 0: # Navigate threw the tree
+					self._selectedIndex -= 1
+					if (self._selectedIndex < self._offset):
+						self._offset -= 1
+					dirty = True
+				elif key == KEY_DOWN and self._selectedIndex < len(self._files) - 1: # Navigate threw the tree
+					self._selectedIndex += 1
+					if (self._selectedIndex > self._availableLines - 1 + self._offset):
+						self._offset += 1
+					dirty = True
+				elif key == KEY_LEFT:
+					self._changeDir(os.path.dirname(self._currentDir))
+					dirty = True
+				elif key == KEY_RIGHT:
+					self._onKeyRight()
+					dirty = True
+				elif key == KEY_ENTER or key == 10 or key == 13: # ENTER or \n or \r
+					if self._onEnterPress():
+						self._running = False
+					else:
+						dirty = True
+				elif key == KEY_RESIZE: # The geometry is recomputed by _display
+					dirty = True
+				elif key == KEY_HIDDEN: # Toggle the hidden files
+					self._showHidden = not self._showHidden
+					self._changeDir(self._currentDir) # Rescan with the new filter
+					dirty = True
+				# TODO : one key to press to enter the full path with the keyboard
+
+				key = self._stdscr.getch()
+
+			# Swap in the result of a background directory scan once it is done
+			if self._scanFuture and self._scanFuture.done():
+				try:
+					self._files, self._isDir, self._filePaths = self._scanFuture.result()
+				except OSError as e:
+					self._logger.error("Could not scan %s : %s", self._currentDir, e)
+					self._files, self._isDir, self._filePaths = [], {}, {}
+				self._scanFuture = None
+				dirty = True
+
+			# Redraw only when a key actually changed something
+			if dirty and self._running:
+				self._display()
 
 		# End of the file manager
 		self._logger.info("Ending files manager")
@@ -213,72 +301,168 @@ class FilesManager(threading.Thread):
 		Initializes the colors used in the terminal.
 		The values used are defined upstream, in the "COLORS" dictionnary (check the VARIABLES section).
 		"""
+		global ATTR_TEXT, ATTR_FILE, ATTR_DIR, ATTR_PATH, ATTR_ALERT
 
-		# ********** Basic colors ********** 
+		# ********** Basic colors **********
 		# Creates pairs linked to an integer
 		# They represent the foreground color, then the background color
-		curses.init_pair(COLORS["index"]["dir"], curses.COLOR_CYAN, curses.COLOR_BLACK) # Directory
-		curses.init_pair(COLORS["index"]["alert"], curses.COLOR_RED, curses.COLOR_BLACK) # Alert
+		curses.init_pair(COLORS["dir"], curses.COLOR_CYAN, curses.COLOR_BLACK) # Directory
+		curses.init_pair(COLORS["alert"], curses.COLOR_RED, curses.COLOR_BLACK) # Alert
 
-		# Match the color object on the color pair
-		# These are the objects used when displaying some text
-		COLORS["curses"]["text"] = curses.color_pair(COLORS["index"]["text"])
-		COLORS["curses"]["file"] = curses.color_pair(COLORS["index"]["file"])
-		COLORS["curses"]["dir"] = curses.color_pair(COLORS["index"]["dir"])
-		COLORS["curses"]["path"] = curses.color_pair(COLORS["index"]["path"])
-		COLORS["curses"]["alert"] = curses.color_pair(COLORS["index"]["alert"])
+		# Resolve the formats once, as plain integers used when displaying some text
+		ATTR_TEXT = curses.color_pair(COLORS["text"])
+		ATTR_FILE = curses.color_pair(COLORS["file"])
+		ATTR_DIR = curses.color_pair(COLORS["dir"]) | curses.A_BOLD
+		ATTR_PATH = curses.color_pair(COLORS["path"])
+		ATTR_ALERT = curses.color_pair(COLORS["alert"])
 
 		# ********** Alert colors **********
-		
 
-	def _drawHorizontalLine(self, line: int) -> None:
+
+	def _drawHorizontalLine(self, buffer, line: int, width: int) -> None:
 		"""
-		Draws an horizontal line at the y line, through the whole screen.
+		Draws an horizontal line at the y line, through the whole screen, in the given buffer.
 		"""
-		_, maxY = self._stdscr.getmaxyx()
-		for i in range(maxY):
-			self._stdscr.addch(line, i, curses.ACS_HLINE | COLORS["curses"]["text"])
+		# ACS_HLINE carries the alternate-charset attribute with the character : the
+		# attribute part goes in the format bits, the character part in the low bits
+		packed = ((ATTR_TEXT | (curses.ACS_HLINE & ~curses.A_CHARTEXT)) << CELL_CHAR_BITS) | (curses.ACS_HLINE & curses.A_CHARTEXT)
+		base = line * width
+		for i in range(width):
+			buffer[base + i] = packed
+
+
+	def _bufferAddStr(self, buffer, y: int, x: int, text: str, format: int, width: int) -> None:
+		"""
+		Writes a string in the given buffer, cell by cell. The text is cut if it goes past the screen.
+		"""
+		base = y * width + x
+		packedFormat = format << CELL_CHAR_BITS
+		for i in range(min(len(text), width - x)):
+			buffer[base + i] = packedFormat | ord(text[i])
 
 
 	def _display(self) -> None:
 		"""
 		Displays the lines on the screen, with few additionnal infos like the keys to navigate through the tree.
+		The frame is first built in the back buffer, then only the cells that changed since the
+		previous frame are sent to curses (differential rendering). This avoids flushing the
+		whole screen on every keypress, which is the dominant cost on slow/SSH terminals.
 		"""
 
-		self._stdscr.clear()
 		height, width = self._stdscr.getmaxyx()
 
+		# A resize (or the first frame) invalidates the previous frame : force a full repaint
+		if self._frontBuffer is None or len(self._frontBuffer) != height * width or self._bufferWidth != width:
+			self._frontBuffer = None
+			self._bufferWidth = width
+			self._blankRow = array.array('L', [(ATTR_TEXT << CELL_CHAR_BITS) | ord(' ')]) * width
+			# erase() only blanks the in-memory window : unlike clear() it does not
+			# emit a clear-screen sequence forcing the terminal to repaint from scratch
+			self._stdscr.erase()
+			# The geometry only changes here, no need to recompute it every frame
+			self._availableLines = height - HEADER_LINES - FOOTER_LINES
+		self._backBuffer = self._blankRow * height
+
+		self._compose(self._backBuffer, height, width)
+		self._flush(height, width)
+
+		# noutrefresh + doupdate batches the updates of all the windows into a
+		# single terminal write, instead of one flush per refresh call
+		self._stdscr.noutrefresh()
+		curses.doupdate()
+
+
+	def _compose(self, buffer, height: int, width: int) -> None:
+		"""
+		Fills the given buffer with the whole frame : header, footer and the files list.
+		"""
+
 		# ---------- Header ----------
-		headerLines = 2
-		self._stdscr.addstr(0, 0, "path :", COLORS["curses"]["text"])
-		# If too large for the screen (size of "path : ..." + 1), shortens the path
-		if (len(self._currentDir)) < width-11:
-			self._stdscr.addstr(0, 7, self._currentDir, COLORS["curses"]["path"])
+		self._bufferAddStr(buffer, 0, 0, "path :", ATTR_TEXT, width)
+		# The shortened path only changes with the directory or the width : reuse the
+		# cached string instead of slicing and formatting it again on every frame
+		if self._pathCache and self._pathCache[0] is self._currentDir and self._pathCache[1] == width:
+			pathText = self._pathCache[2]
 		else:
-			self._stdscr.addstr(0, 7, "...{}".format(self._currentDir[len(self._currentDir)-width+11:]), COLORS["curses"]["path"])
-		self._drawHorizontalLine(1)
+			# If too large for the screen (size of "path : ..." + 1), shortens the path
+			if (len(self._currentDir)) < width-11:
+				pathText = self._currentDir
+			else:
+				pathText = "...{}".format(self._currentDir[len(self._currentDir)-width+11:])
+			self._pathCache = (self._currentDir, width, pathText)
+		self._bufferAddStr(buffer, 0, 7, pathText, ATTR_PATH, width)
+		self._drawHorizontalLine(buffer, 1, width)
 
 		# ---------- Footer ----------
-		footerLines = 2
-		self._drawHorizontalLine(height-2)
-		footer = "[q] Quit    [<] Go out    [>] Go in    [ENTER] Send file"
-		if width > 56: # len(footer) 
-			self._stdscr.addstr(height-1, 0, "[q] Quit    [<] Go out    [>] Go in    [ENTER] Send file", COLORS["curses"]["text"])
-		else:
-			self._stdscr.addstr(height-1, 0, "[q]    [<]    [>]    [ENTER]", COLORS["curses"]["text"])
+		self._drawHorizontalLine(buffer, height-2, width)
+		self._bufferAddStr(buffer, height-1, 0, FOOTER_FULL if width > FOOTER_FULL_LEN else FOOTER_SHORT, ATTR_TEXT, width)
 
 		# ---------- Main ----------
-		self._availableLines = height - headerLines - footerLines
 		# The offset allows to scrool the list if it is too long to be shown in the entire screen
 		offset = max(0, self._selectedIndex - self._availableLines + 1)
+		# The visible row holding the selection, computed once instead of one
+		# comparison + multiply per row
+		selectedVisibleRow = self._selectedIndex - self._offset
 		for i in range(min(len(self._files), self._availableLines)):
-			currentFile = os.path.join(self._currentDir, self._files[i + self._offset])
-			if os.path.isdir(currentFile):
-				self._stdscr.addstr(i + headerLines, 0, self._files[i + self._offset], COLORS["curses"]["dir"] | curses.A_BOLD | curses.A_REVERSE*((i + self._offset)==self._selectedIndex))
-			else:
-				self._stdscr.addstr(i + headerLines, 0, self._files[i + self._offset], COLORS["curses"]["file"] | curses.A_REVERSE*((i + self._offset)==self._selectedIndex))
+			# The name is padded with spaces to the whole line, so the row is a single style run
+			# and the selection band covers the full line
+			format = ATTR_DIR if self._isDir.get(self._files[i + self._offset], False) else ATTR_FILE
+			if i == selectedVisibleRow:
+				format |= curses.A_REVERSE
+			self._bufferAddStr(buffer, i + HEADER_LINES, 0, self._files[i + self._offset].ljust(width), format, width)
+
 
-		self._stdscr.refresh()
+	def _flush(self, height: int, width: int) -> None:
+		"""
+		Sends to curses only the cells of the back buffer that differ from the front buffer,
+		then the back buffer becomes the new front buffer.
+		"""
+		back = self._backBuffer
+		front = self._frontBuffer
+		altCharset = curses.A_ALTCHARSET
+
+		for y in range(height):
+			rowStart = y * width
+			rowEnd = rowStart + width
+			# Comparing whole row slices is a C-level compare on the arrays :
+			# an unchanged row is skipped without looking at any of its cells
+			if front is not None and back[rowStart:rowEnd] == front[rowStart:rowEnd]:
+				continue
+			x = 0
+			while x < width:
+				cell = back[rowStart + x]
+				if front is not None and front[rowStart + x] == cell:
+					x += 1
+					continue
+				format = cell >> CELL_CHAR_BITS
+				char = cell & CELL_CHAR_MASK
+				try:
+					if format & altCharset:
+						# Special characters (like ACS_HLINE) : one addch each
+						self._stdscr.addch(y, x, char, format)
+					else:
+						# Coalesce the adjacent changed cells sharing the same style
+						# into a single addstr call instead of one addch per cell
+						run = [chr(char)]
+						runEnd = x + 1
+						while runEnd < width:
+							nextCell = back[rowStart + runEnd]
+							if nextCell >> CELL_CHAR_BITS != format:
+								break
+							if front is not None and front[rowStart + runEnd] == nextCell:
+								break
+							run.append(chr(nextCell & CELL_CHAR_MASK))
+							runEnd += 1
+						self._stdscr.addstr(y, x, "".join(run), format)
+						x = runEnd
+						continue
+				except curses.error:
+					# Writing the bottom right cell makes curses scroll out of the screen
+					pass
+				x += 1
+
+		self._frontBuffer = back
+		self._backBuffer = None
 	
 
 	def _alert(self,
@@ -300,26 +484,19 @@ class FilesManager(threading.Thread):
 		yMin = (oldHeight - nLines) // 2
 
 		alertWin = curses.newwin(nLines, nCols, yMin, xMin)
-		
-		while True:
-
-			alertWin.clear()
-
-			# All the lines to show
-			alertWin.addstr(1, (nCols - 5) // 2, "ALERT", curses.A_BOLD | COLORS["curses"]["alert"])
-			if nCols >= len(subText1) + 2:
-				alertWin.addstr(2, (nCols - len(subText1)) // 2, subText1)
-			else:
-				alertWin.addstr(2, (nCols - len(subText1Replacement)) // 2, subText1Replacement)
-			alertWin.addstr(3, (nCols - len(subText2)) // 2, subText2, curses.A_ITALIC)
-			# Empty line
-			alertWin.addstr(5, (nCols - 2) // 3, "No", curses.A_REVERSE*(not response))
-			alertWin.addstr(5, (nCols - 3) // 3 * 2, "Yes", curses.A_REVERSE*response)
+		# The background fill is set once on the window : each redraw then only
+		# needs an erase instead of repainting the rows one by one
+		alertWin.bkgd(' ', ATTR_TEXT)
 
-			alertWin.border() # Border included in the window size.
+		# Draw once before the loop, then only redraw when the selected button changes :
+		# the content is static, repainting it on every key would be wasted work
+		self._drawAlert(alertWin, response, subText1, subText1Replacement, subText2, nCols)
 
-			alertWin.refresh()
+		# While the alert is up nothing moves without a key : block on getch instead
+		# of ticking at the main loop rate, so the alert costs no CPU at all
+		self._stdscr.timeout(-1)
 
+		while True:
 			key = self._stdscr.getch()
 
 			if key == ord('q'):
@@ -332,21 +509,56 @@ class FilesManager(threading.Thread):
 				response = True
 				break
 			elif key == curses.KEY_RIGHT:
-				response = True
+				if not response:
+					response = True
+					self._drawAlert(alertWin, response, subText1, subText1Replacement, subText2, nCols)
 			elif key == curses.KEY_LEFT:
-				response = False
+				if response:
+					response = False
+					self._drawAlert(alertWin, response, subText1, subText1Replacement, subText2, nCols)
 			elif key == curses.KEY_ENTER or key == 10 or key == 13: # ENTER or \n or \r
 				break
-		
+
+		# Back to the non blocking input of the main loop
+		self._stdscr.timeout(16)
+
+		# The alert window overlapped the frame : force a full repaint on the next display
+		self._frontBuffer = None
+
 		return response
 
+
+	def _drawAlert(self, alertWin, response: bool, subText1: str, subText1Replacement: str, subText2: str, nCols: int) -> None:
+		"""
+		Draws the content of the alert window : the texts, the two buttons and the border.
+		"""
+		alertWin.erase() # Cheaper than clear() : does not force a full repaint
+
+		# All the lines to show
+		alertWin.addstr(1, (nCols - 5) // 2, "ALERT", curses.A_BOLD | ATTR_ALERT)
+		if nCols >= len(subText1) + 2:
+			alertWin.addstr(2, (nCols - len(subText1)) // 2, subText1)
+		else:
+			alertWin.addstr(2, (nCols - len(subText1Replacement)) // 2, subText1Replacement)
+		alertWin.addstr(3, (nCols - len(subText2)) // 2, subText2, curses.A_ITALIC)
+		# Empty line
+		alertWin.addstr(5, (nCols - 2) // 3, "No", curses.A_REVERSE*(not response))
+		alertWin.addstr(5, (nCols - 3) // 3 * 2, "Yes", curses.A_REVERSE*response)
+
+		alertWin.border() # Border included in the window size.
+
+		alertWin.noutrefresh()
+		curses.doupdate()
+
 	
 	def _onKeyRight(self) -> None:
 		"""
 		Defines what happens when the user press the right key.
 		"""
 
-		currentFile = os.path.join(self._currentDir, self._files[self._selectedIndex])
+		if self._scanFuture: return # A directory scan is still running
+
+		currentFile = self._filePaths[self._files[self._selectedIndex]]
 		if os.path.isdir(currentFile):
 			self._changeDir(currentFile)
 
@@ -357,7 +569,9 @@ class FilesManager(threading.Thread):
 		Returns the path to the file if a file is selected.
 		"""
 
-		currentFile = os.path.join(self._currentDir, self._files[self._selectedIndex])
+		if self._scanFuture: return False # A directory scan is still running
+
+		currentFile = self._filePaths[self._files[self._selectedIndex]]
 		if os.path.isdir(currentFile):
 			self._changeDir(currentFile)
 		elif self._alert(subText2 = self._files[self._selectedIndex]):
@@ -371,12 +585,62 @@ class FilesManager(threading.Thread):
 		"""
 		Changes the working directory.
 		"""
-		self._stdscr.clear()
+		self._frontBuffer = None # Force a full repaint on the next display
 		self._currentDir = dirPath
 		self._selectedIndex = 0
 		self._offset = 0
-		self._files = sorted(os.listdir(self._currentDir))
+		# The scan runs in the worker thread : a big directory does not freeze the
+		# interface, a placeholder is shown until the result is swapped in by the main loop
+		self._files = ["..."]
+		self._isDir = {}
+		self._filePaths = {}
+		self._scanFuture = self._scanExecutor.submit(self._scanDir, dirPath)
 		self._logger.debug("Current directory changed : %s", self._currentDir)
+
+
+	def _loadDir(self) -> None:
+		"""
+		Lists the files of the current directory and caches which ones are directories.
+		"""
+		self._files, self._isDir, self._filePaths = self._scanDir(self._currentDir)
+
+
+	def _scanDir(self, dirPath: str) -> tuple:
+		"""
+		Scans a directory and returns the sorted files list and the directories cache.
+		Using scandir allows to know if an entry is a directory without an additionnal
+		stat call per file, so the display loop does not have to ask the system anymore.
+		The result is kept in a small LRU cache : revisiting an unchanged directory
+		(same modification time) does not pay the scan again.
+		"""
+		try:
+			mtime = os.stat(dirPath).st_mtime_ns
+		except OSError:
+			mtime = None
+
+		key = (dirPath, mtime, self._showHidden)
+		if mtime is not None and key in self._dirCache:
+			self._dirCache.move_to_end(key)
+			return self._dirCache[key]
+
+		isDir = {}
+		filePaths = {}
+		with os.scandir(dirPath) as entries:
+			for entry in entries:
+				# Hidden files are filtered here, before any flag is fetched
+				if not self._showHidden and entry.name.startswith('.'):
+					continue
+				isDir[entry.name] = entry.is_dir(follow_symlinks=False)
+				filePaths[entry.name] = entry.path # Already joined, no os.path.join needed later
+		# Case-insensitive order, sorted once per load ; cached hits skip the sort
+		result = (sorted(isDir, key=str.casefold), isDir, filePaths)
+
+		if mtime is not None:
+			self._dirCache[key] = result
+			if len(self._dirCache) > DIR_CACHE_SIZE:
+				self._dirCache.popitem(last=False) # Drop the least recently used entry
+
+		return result
 		
 
 	def stop(self) -> None:
@@ -384,6 +648,7 @@ class FilesManager(threading.Thread):
 		Stops the files manager.
 		"""
 		self._running = False
+		self._scanExecutor.shutdown(wait=False)
 
 
 
@@ -55,7 +55,24 @@ identificationFunction = None
 # ===========================================================================================
 # Functions declaration/definition
 
-pass
+class CachedTimeFormatter(logging.Formatter):
+	"""
+	Formatter caching the formatted timestamp per second.
+	The date format used here ("%H:%M:%S") has a one second resolution, so all the
+	records emitted within the same second can reuse the string instead of paying
+	a strftime call each : useful with the debug traces of the receive loop.
+	"""
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._timeCache = (None, None) # (integer second, formatted string)
+
+	def formatTime(self, record, datefmt=None):
+		second = int(record.created)
+		if self._timeCache[0] == second:
+			return self._timeCache[1]
+		formatted = super().formatTime(record, datefmt)
+		self._timeCache = (second, formatted)
+		return formatted
 
 
 
@@ -67,7 +84,7 @@ if __name__ == "__main__":
 
 	if not os.path.exists(os.path.dirname(logsFile)): os.makedirs(os.path.dirname(logsFile))
 	handler = logging.FileHandler(logsFile)
-	handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s (%(name)s): %(message)s", datefmt="%H:%M:%S"))
+	handler.setFormatter(CachedTimeFormatter("[%(asctime)s] %(levelname)s (%(name)s): %(message)s", datefmt="%H:%M:%S"))
 	handler.setLevel(logging.DEBUG if DEBUG else logging.INFO)
 
 	mainLogger = logging.Logger("main")
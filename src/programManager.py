@@ -18,10 +18,8 @@
 import logging
 import threading
 import os
-import time
-import re
 from datetime import datetime
-from socket import error as socketError
+from socket import error as socketError, inet_aton
 
 
 
@@ -44,6 +42,11 @@ from terminal import Terminal
 logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d-%m-%Y_%H:%m:%S'))) # Day + time
 # logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d-%m-%Y'))) # Only day
 
+# Command names indexed by the cmd field of the header byte, one table per side.
+# The hardware reset (cmd 2) resolves with info : fpga when set, fifo otherwise
+HW_COMMANDS = ("status", "route", ("rstfifo", "rstfpga"))
+SW_COMMANDS = ("id", "load", "rstptr")
+
 
 # ===========================================================================================
 # **************************************** FUNCTIONS ****************************************
@@ -53,20 +56,32 @@ logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d
 def isValidIpv4(ip: str) -> bool:
 	if not isinstance(ip, str): return False
 
-	# Regular expression pattern for IPv4 address
-	ipv4_pattern = r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$"
+	# inet_aton does the whole dotted-quad parse and range check in C.
+	# The count check rejects the legacy short forms it accepts ("1.2.3")
+	try:
+		inet_aton(ip)
+	except OSError:
+		return False
+	return ip.count(".") == 3
 
-	# Check if the string matches the pattern
-	match = re.match(ipv4_pattern, ip)
 
-	if match:
-		# Check if each octet is within the valid range (0-255)
-		for octet in match.groups():
-			if not (0 <= int(octet) <= 255): return False
-		return True
-	else:
-		return False
-	
+def decodeHeader(headerByte: int) -> tuple:
+	"""
+	Splits a command byte into its (hw, cmd, info) fields.
+	"""
+	return (headerByte >> 7, (headerByte >> 4) & 0b111, headerByte & 0b1111)
+
+
+def commandName(hw: int, cmd: int, info: int) -> str:
+	"""
+	Returns the name of a decoded command, or None if it does not exist.
+	"""
+	commands = HW_COMMANDS if hw else SW_COMMANDS
+	if cmd >= len(commands): return None
+	name = commands[cmd]
+	if isinstance(name, tuple): name = name[1 if info else 0]
+	return name
+
 
 def displayErrors(receivedData, logger) -> None:
 	"""
@@ -74,10 +89,7 @@ def displayErrors(receivedData, logger) -> None:
 	"""
 	# Decode the command
 	if len(receivedData) == 0: return
-	cmd = receivedData[0] # Take the first byte
-	info = cmd & 0b1111
-	hw = cmd >> 7
-	cmd = (cmd >> 4) & 0b111
+	hw, cmd, info = decodeHeader(receivedData[0]) # The command is the first byte
 
 	if len(receivedData) > 1:
 		additionnalData = receivedData[1:]
@@ -88,30 +100,18 @@ def displayErrors(receivedData, logger) -> None:
 		error = int.from_bytes(additionnalData, byteorder="big")
 	except ValueError:
 		error = additionnalData
-		
+
 	print("\nreceived : ", end="")
 	# Display the command
-	if hw:
-		if cmd == 0:
-			print("status", end="")
-		elif cmd == 1:
-			print("route", info, end="")
-		elif cmd == 2:
-			if info :
-				print("rstfpga", end="")
-			else:
-				print("rstfifo", end="")
-		else:
-			logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
+	name = commandName(hw, cmd, info)
+	if name is None:
+		logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
+	elif name == "id":
+		print("id", repr(additionnalData))
+	elif name in ("route", "load", "rstptr"):
+		print(name, info, end="")
 	else:
-		if cmd == 0:
-			print("id", repr(additionnalData))
-		elif cmd == 1:
-			print("load", info, end="")
-		elif cmd == 2:
-			print("rstptr", info, end="")
-		else:
-			logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
+		print(name, end="")
 
 
 	# End
@@ -141,8 +141,8 @@ class ProgramManager(threading.Thread):
 				threadGroup=None,
 				threadTarget=None,
 				threadName=None,
-				threadArgs=list(),
-				threadKwargs=dict(),
+				threadArgs=None,
+				threadKwargs=None,
 				threadDaemon=None,
 				mainLogger=None,
 				serverLogger=None,
@@ -153,8 +153,10 @@ class ProgramManager(threading.Thread):
 		super().__init__(group=threadGroup, target=threadTarget, name=threadName, daemon=threadDaemon)
 
 		self._address = address
-		self._args = threadArgs
-		self._kwargs = threadKwargs
+		# None sentinels instead of mutable defaults : a list()/dict() default is
+		# built once at def-time and shared between every instance
+		self._args = tuple(threadArgs) if threadArgs is not None else ()
+		self._kwargs = threadKwargs if threadKwargs is not None else {}
 		
 		self._logger = mainLogger
 		
@@ -163,6 +165,20 @@ class ProgramManager(threading.Thread):
 		self._filesManager = FilesManager(logger=filesManagerLogger, threaded=False)
 		self._terminal = Terminal(logger=terminalLogger, executeCommandFunction=self._handleCommand)
 
+		# One handler per command : dict lookup replaces a chain of string
+		# compares, and adding a command is one entry here plus its method
+		self._commandHandlers = {
+			"exit": self._cmdExit,
+			"id": self._cmdId,
+			"load": self._cmdLoad,
+			"rstptr": self._cmdRstptr,
+			"status": self._cmdStatus,
+			"route": self._cmdRoute,
+			"rstfifo": self._cmdRstfifo,
+			"rstfpga": self._cmdRstfpga,
+			"custom": self._cmdCustom
+		}
+
 		self._handleReceivedDataRunning = False # The loop for handling received data
 
 		self._running = False # The main loop
@@ -203,119 +219,136 @@ class ProgramManager(threading.Thread):
 
 		# Infinite loop
 		while self._handleReceivedDataRunning:
+			# Blocks until a frame arrives ; the timeout only serves the
+			# periodic check of the running flag
+			receivedData = self._server.getFrame(timeout=0.5)
+			# Drains everything already queued in a single wakeup before
+			# blocking again : a burst is handled without re-waiting per frame
+			while receivedData is not None:
+				self._processFrame(receivedData)
+				receivedData = self._server.getFrame(timeout=0)
+
+
+	def _processFrame(self, receivedData) -> None:
+		"""
+		Decodes one received frame and displays it.
+		"""
+		# Decode the command
+		if len(receivedData) == 0: return
+		hw, cmd, info = decodeHeader(receivedData[0]) # The command is the first byte
+
+		# To choose which format for displaying, uncomment the wanted section
+
+		# With decode
+		if len(receivedData) > 1:
 			try:
-				receivedData = self._server.getReceivedData().pop(0) # Take the oldest received data
-			except IndexError: # No data received
-				time.sleep(0.5)
-				continue
-
-			# Decode the command
-			if len(receivedData) == 0: continue
-			cmd = receivedData[0] # Take the first byte
-			info = cmd & 0b1111
-			hw = cmd >> 7
-			cmd = (cmd >> 4) & 0b111
-			
-			# To choose which format for displaying, uncomment the wanted section
-
-			# With decode
-			if len(receivedData) > 1:
-				try:
-					additionnalData = receivedData[1:].decode()
-				except UnicodeDecodeError:
-					additionnalData = receivedData[1:]
-			else:
-				additionnalData = ""
-
-			# Display the command
-			if hw:
-				if cmd == 0:
-					self._terminal.addEntry("status", repr(additionnalData), flags=terminal.RECEIVED)
-				elif cmd == 1:
-					self._terminal.addEntry("route", repr(info) + repr(additionnalData), flags=terminal.RECEIVED)
-				elif cmd == 2:
-					if info :
-						self._terminal.addEntry("rstfpga", repr(additionnalData), flags=terminal.RECEIVED)
-					else:
-						self._terminal.addEntry("rstfifo", repr(additionnalData), flags=terminal.RECEIVED)
-				else:
-					self._terminal.addEntry("received data", "the command hw:{} cmd:{} could not be found.".format(hw, cmd), flags=terminal.ALERT)
-					self._logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
-			else:
-				if cmd == 0:
-					self._terminal.addEntry("id", repr(additionnalData), flags=terminal.RECEIVED)
-					self._terminal.connectedClient = repr(additionnalData)
-				elif cmd == 1:
-					self._terminal.addEntry("load", repr(info) + repr(additionnalData), flags=terminal.RECEIVED)
-				elif cmd == 2:
-					self._terminal.addEntry("rstptr", repr(info) + repr(additionnalData), flags=terminal.RECEIVED)
-				else:
-					self._terminal.addEntry("received data", "the command hw:{} cmd:{} could not be found.".format(hw, cmd), flags=terminal.ALERT)
-					self._logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
-			
-			# # Without decode
-			# self._terminal.addEntry("received (plain)", receivedData, flags=terminal.RECEIVED)
+				additionnalData = receivedData[1:].decode()
+			except UnicodeDecodeError:
+				additionnalData = receivedData[1:]
+		else:
+			additionnalData = ""
+
+		# Display the command
+		name = commandName(hw, cmd, info)
+		if name is None:
+			self._terminal.addEntry("received data", "the command hw:{} cmd:{} could not be found.".format(hw, cmd), flags=terminal.ALERT)
+			self._logger.warning("The command hw:{} cmd:{} could not be found.".format(hw, cmd))
+		elif name == "id":
+			self._terminal.addEntry("id", repr(additionnalData), flags=terminal.RECEIVED)
+			self._terminal.connectedClient = repr(additionnalData)
+		elif name in ("route", "load", "rstptr"):
+			self._terminal.addEntry(name, repr(info) + repr(additionnalData), flags=terminal.RECEIVED)
+		else:
+			self._terminal.addEntry(name, repr(additionnalData), flags=terminal.RECEIVED)
+
+		# # Without decode
+		# self._terminal.addEntry("received (plain)", receivedData, flags=terminal.RECEIVED)
 
 
 	def _handleCommand(self, command: str, *data) -> None:
 		"""
 		Handle a new command entry
 		"""
+		handler = self._commandHandlers.get(command)
+		if handler is None:
+			self._terminal.addEntry(command, "command unknown", flags=terminal.ALERT)
+			return
+
 		try:
-			# Runs the function depending on the command
-			if command == "exit":
-				self.stop()
-				return
-			elif command == "id":
-				id = self._server.askIdentification()
-				if not id:
-					raise ConnectionError("connexion refused : connexion not valid")
-			elif command == "load":
-				if len(data) == 0:
-					raise AttributeError("not enough parameter was given")
-				info = int(data[0])
-				if info < 0 or info > 7: raise Exception("info has to be in range 0 to 7")
-				path = self._filesManager.start()
-				self._server.sendFile(path, info)
-			elif command == "rstptr":
-				if len(data) == 0: raise AttributeError("no parameter was given")
-				info = 8 if data[0] == "all" else int(data[0])
-				if info < 0 or info > 8: raise Exception("info has to be in range 0 to 8")
-				self._server.sendCommand(0, 2, info)
-			elif command == "status":
-				self._server.sendCommand(1, 0)
-			elif command == "route":
-				if len(data) == 0: raise AttributeError("no parameter was given")
-				info = int(data[0])
-				if info < 0 or info > 7: raise Exception("info has to be in range 0 to 7")
-				self._server.sendCommand(1, 1, info)
-			elif command == "rstfifo":
-				self._server.sendCommand(1, 2, 0)
-			elif command == "rstfpga":
-				self._server.sendCommand(1, 2, 1)
-			elif command == "custom":
-				# Sends whatever is specified in parameters
-				if len(data) > 0 and data[0] == "-b":
-					if len(data) > 2:
-						self._terminal.addEntry(command, f"warning : ignoring the parameters after {data[1]} because sending bits", flags=terminal.BOLD)
-
-					# Pad the bit string with zeros to make its length a multiple of 8
-					paddedBitString = data[1].ljust((len(data[1]) + 7) // 8 * 8, '0')
-					# Convert the padded bit string to bytes
-					byteArray = bytearray(int(paddedBitString[i:i+8], 2) for i in range(0, len(paddedBitString), 8))
-					
-					self._server._connectedSocket[0].sendall(bytes(byteArray).ljust(self._server._bufferSize, b'\x00')) # adjust the size to the buffer size
-				else:
-					self._server._connectedSocket[0].sendall(" ".join(data).encode())
-			else:
-				self._terminal.addEntry(command, "command unknown", flags=terminal.ALERT)
-				return
+			# Runs the function depending on the command. A handler returning
+			# True (exit) skips the status entry
+			if handler(*data): return
 		except Exception as e:
 			self._terminal.addEntry(command, "could not send the command: {}".format(e), flags=terminal.ALERT)
 			self._logger.warning("Could not send the command %s %s : %s", command, " ".join(data), e)
 		else:
 			self._terminal.addEntry(command, "executed" + '' if not len(data) else " with data: " + " ".join(data), flags=terminal.SENT)
-			self._logger.debug("%s %s command executed", command, " ".join(data))
+			# Gated : the join would otherwise be computed even with DEBUG off
+			if self._logger.isEnabledFor(logging.DEBUG):
+				self._logger.debug("%s %s command executed", command, " ".join(data))
+
+
+	def _cmdExit(self, *data) -> bool:
+		self.stop()
+		return True
+
+
+	def _cmdId(self, *data) -> None:
+		id = self._server.askIdentification()
+		if not id:
+			raise ConnectionError("connexion refused : connexion not valid")
+
+
+	def _cmdLoad(self, *data) -> None:
+		if len(data) == 0:
+			raise AttributeError("not enough parameter was given")
+		info = int(data[0])
+		if info < 0 or info > 7: raise Exception("info has to be in range 0 to 7")
+		path = self._filesManager.start()
+		self._server.sendFile(path, info)
+
+
+	def _cmdRstptr(self, *data) -> None:
+		if len(data) == 0: raise AttributeError("no parameter was given")
+		info = 8 if data[0] == "all" else int(data[0])
+		if info < 0 or info > 8: raise Exception("info has to be in range 0 to 8")
+		self._server.sendCommand(0, 2, info)
+
+
+	def _cmdStatus(self, *data) -> None:
+		self._server.sendCommand(1, 0)
+
+
+	def _cmdRoute(self, *data) -> None:
+		if len(data) == 0: raise AttributeError("no parameter was given")
+		info = int(data[0])
+		if info < 0 or info > 7: raise Exception("info has to be in range 0 to 7")
+		self._server.sendCommand(1, 1, info)
+
+
+	def _cmdRstfifo(self, *data) -> None:
+		self._server.sendCommand(1, 2, 0)
+
+
+	def _cmdRstfpga(self, *data) -> None:
+		self._server.sendCommand(1, 2, 1)
+
+
+	def _cmdCustom(self, *data) -> None:
+		# Sends whatever is specified in parameters
+		if len(data) > 0 and data[0] == "-b":
+			if len(data) > 2:
+				self._terminal.addEntry("custom", f"warning : ignoring the parameters after {data[1]} because sending bits", flags=terminal.BOLD)
+
+			# Pad the bit string with zeros to make its length a multiple of 8
+			paddedBitString = data[1].ljust((len(data[1]) + 7) // 8 * 8, '0')
+			# Convert the padded bit string to bytes : a single C-level bignum
+			# parse instead of one int(..., 2) call per byte
+			toSend = int(paddedBitString, 2).to_bytes(len(paddedBitString) // 8, "big")
+
+			self._server._connectedSocket[0].sendall(toSend.ljust(self._server._bufferSize, b'\x00')) # adjust the size to the buffer size
+		else:
+			self._server._connectedSocket[0].sendall(" ".join(data).encode())
 
 
 
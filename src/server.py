@@ -18,6 +18,8 @@
 import logging
 import threading
 import socket
+import selectors
+import queue
 import os
 from datetime import datetime
 import errno
@@ -42,12 +44,13 @@ logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d
 # logsFile = os.path.join("logs", "main_{}.log".format(datetime.now().strftime('%d-%m-%Y'))) # Only day
 
 # All the valid MAC addresses that can communicate with the server
-# To add a MAC address to the list, specify it in binary with all bytes
+# To add a MAC address to the set, specify it in binary with all bytes
 # Example : b"\x00\x0a\x35\x00\x01\x02"
-validMacAddresses = [
+# frozenset : the membership test is a single hash probe instead of a scan
+validMacAddresses = frozenset([
 	b"\x00\x0a\x35\x00\x01\x02",
 	b"\x01\x23\x45\x67\x89\xab\xcd"
-]
+])
 
 
 # ===========================================================================================
@@ -55,11 +58,15 @@ validMacAddresses = [
 # ===========================================================================================
 # Functions declaration/definition
 
+# The identification lengths that can match (+1 for the command byte) :
+# junk input is rejected on its length before paying the slice and the hash
+validMacLengths = frozenset(len(mac) + 1 for mac in validMacAddresses)
+
 def testMACAddress(identification) -> bool:
 	"""
 	Check if a MAC address is valid
 	"""
-	return identification[1:] in validMacAddresses
+	return len(identification) in validMacLengths and identification[1:] in validMacAddresses
 
 # ===========================================================================================
 # ****************************************** CLASS ******************************************
@@ -83,40 +90,81 @@ class Server(threading.Thread):
 				socketProto=-1,
 				socketfileno=None,
 				bufferSize=512,
+				receiveChunk=16384,
+				socketBufferSize=262144,
 				identificationFunction=testMACAddress,
 				threadGroup=None,
 				threadTarget=None,
 				threadName=None,
-				threadArgs=list(),
-				threadKwargs=dict(),
+				threadArgs=None,
+				threadKwargs=None,
 				threadDaemon=None,
 				logger=None) -> None:
 		
 		super().__init__(group=threadGroup, target=threadTarget, name=threadName, daemon=threadDaemon)
 
 		self._address = address
-		self._args = threadArgs
-		self._kwargs = threadKwargs
+		# None sentinels instead of mutable defaults : a list()/dict() default is
+		# built once at def-time and shared between every instance
+		self._args = tuple(threadArgs) if threadArgs is not None else ()
+		self._kwargs = threadKwargs if threadKwargs is not None else {}
 		self._socketInfos = (socketFamily, socketType, socketProto, socketfileno)
 		self._bufferSize = bufferSize
+		# How many bytes each recv asks the kernel for. The frames sent to the
+		# client stay bufferSize long (the FPGA expects that framing), but reading
+		# more per syscall amortizes the syscall cost on big transfers
+		self._receiveChunk = max(receiveChunk, bufferSize)
+		# Kernel socket buffer size, applied to the listener and to every
+		# accepted connexion : sized for file transfer bursts by default
+		self._socketBufferSize = socketBufferSize
+		# Reusable zero padding for the fixed-size command frames
+		self._framePad = bytes(bufferSize - 1)
+		# Persistent receive buffer : _receiveData fills it in place and copies
+		# out only the valid prefix, so no buffer is allocated per receive.
+		# Grows geometrically on large transfers and keeps the grown size
+		self._recvBuf = bytearray(self._receiveChunk)
 		try:
 			self._socket = socket.socket(*self._socketInfos)
-			self._socket.settimeout(1)
 		except Exception as e:
 			raise e
-		self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self._configureSocket()
 		self._serverOpen = False
 		self._connectedSocket = None # List : 0 is the socket, 1 the adress, 2 the ID
 		self._logger = logger
-		self._receivedData = list()
+		# Queue instead of a list : the consumer blocks on get() until a frame
+		# arrives (futex wake) and the dequeue is O(1) where list.pop(0) was O(n)
+		self._receivedData = queue.Queue()
 		self.identificationFunction = identificationFunction
     
 
+	def _configureSocket(self) -> None:
+		"""
+		Applies the socket options on the listening socket.
+		"""
+		self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		# Lets several listeners share the (ip, port) with their own accept
+		# queues, should more server threads be needed ; not available everywhere
+		if hasattr(socket, "SO_REUSEPORT"):
+			self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+		# Low latency for the small command frames : disabling Nagle's algorithm avoids
+		# the ~40 ms coalescing delay. Accepted sockets inherit these options
+		self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		# Large kernel buffers so file transfer bursts do not stall on the socket
+		self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._socketBufferSize)
+		self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._socketBufferSize)
+
+
 	def _open(self) -> None:
 		"""
         Opens the socket's connexion on the address given in the initialization.
 		"""
 
+		# The socket was closed by a previous _close : only pay for a new fd
+		# when the server is actually reopened
+		if self._socket.fileno() == -1:
+			self._socket = socket.socket(*self._socketInfos)
+			self._configureSocket()
+
 		self._logger.info("Opening the server connexion...")
 		try:
 			self._socket.bind(self._address)
@@ -138,33 +186,40 @@ class Server(threading.Thread):
 			self._logger.info("The server is already closed")
 			return
 		self._logger.info("Closing connexion...")
-		self._socket.close()
 		self._serverOpen = False
-		self._socket = socket.socket(*self._socketInfos)
+		# Shutting the socket down wakes up a blocked accept in the server thread
+		try:
+			self._socket.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass # Not connected (never bound, or already shut down)
+		self._socket.close()
 		self._logger.info("Server connexion closed")
     
     
 	def _accept(self) -> bool:
 		"""
 		Accepts a connexion.
+		The accept is blocking : the thread sleeps in the kernel until a client
+		arrives, instead of waking up every second to poll. stop() unblocks it
+		by shutting the listening socket down.
 		"""
 		self._connectedSocket = None
 
-		while self._serverOpen and self._connectedSocket == None:
-			try:
-				conn, addr = self._socket.accept()
-				conn.setblocking(0)
-				self._connectedSocket = [conn, addr]
-				self._logger.info("Accepted connexion from %s:%d", addr[0], addr[1])
-			except socket.timeout:
-				if self._serverOpen:
-					continue
-				else:
-					return False
-			except OSError:
-				continue
-			else:
-				return True
+		try:
+			conn, addr = self._socket.accept()
+		except OSError:
+			# The socket was shut down or closed while waiting
+			return False
+		conn.setblocking(0)
+		# Inherited from the listener on Linux, but set explicitly : the small
+		# command frames must not wait out Nagle's coalescing delay, and the
+		# large kernel buffers keep file transfer bursts off the stall path
+		conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._socketBufferSize)
+		conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._socketBufferSize)
+		self._connectedSocket = [conn, addr]
+		self._logger.info("Accepted connexion from %s:%d", addr[0], addr[1])
+		return True
 
 
 	def _receiveData(self, blocking=False) -> bytes:
@@ -174,39 +229,88 @@ class Server(threading.Thread):
 		If blocking is set to True, will continue to search for data to be received while
 		none has been received yet.
 		"""
-		self._logger.debug("_receiveData called")
-		allData = None
+		# The debug trace is gated : this runs in the receive loop, and even a
+		# no-op logging call costs a record build when the level is disabled
+		if self._logger.isEnabledFor(logging.DEBUG):
+			self._logger.debug("_receiveData called")
+		# Hoisted locals : the loop body avoids the attribute lookups and tuple
+		# indexing per recv, and keeps a reference even if stop() resets
+		# _connectedSocket from another thread while this one is waiting
+		connected = self._connectedSocket
+		if not connected:
+			return None
+		sock, addr = connected[0], connected[1]
+		recvInto = sock.recv_into
+		chunk = self._receiveChunk
+		# recv_into writes straight into the persistent buffer, grown geometrically
+		# when full : no intermediate bytes object is allocated per chunk and the
+		# buffer itself is reused across calls (extend grows it in place)
+		buffer = self._recvBuf
+		offset = 0
+		eof = False
 		while True:
 			try:
-				newData = self._connectedSocket[0].recv(self._bufferSize)
-				allData = newData
-				while len(newData) >= self._bufferSize:
-					newData = self._connectedSocket[0].recv(self._bufferSize)
-					allData += newData
+				received = recvInto(memoryview(buffer)[offset:offset + chunk])
+				if received == 0:
+					# recv returning 0 on a readable socket means the peer closed
+					# the connexion : no more data will ever arrive, stop here
+					# instead of spinning on empty reads
+					eof = True
+				else:
+					offset += received
+					while received >= chunk:
+						if len(buffer) - offset < chunk:
+							buffer.extend(bytes(len(buffer))) # Double the buffer
+						received = recvInto(memoryview(buffer)[offset:offset + chunk])
+						if received == 0:
+							eof = True
+							break
+						offset += received
 			except BlockingIOError as e:
 				if e.errno == errno.EAGAIN or e.errno == errno.EWOULDBLOCK:
 					# No data available to read at the moment
-					if blocking:
-						time.sleep(0.5)
+					if offset == 0 and blocking:
+						# Wait in the kernel until the client is readable instead of
+						# a fixed nap : the wake-up happens as soon as data arrives,
+						# the timeout only bounds the wait if the client stays silent
+						selector = selectors.DefaultSelector()
+						selector.register(sock, selectors.EVENT_READ)
+						selector.select(timeout=0.5)
+						selector.close()
 						continue
 					else:
 						break
 				else:
 					# Other error occurred, handle it appropriately
-					self._logger.error("error while receiving data:", e)
+					self._logger.error("error while receiving data: %s", e)
 					return None
-			
-			if allData or not blocking:
+			except ConnectionError:
+				# The connexion was reset by the peer : same treatment as a clean EOF
+				eof = True
 				break
-		
-		if allData == b"\xff":
+			except OSError:
+				# The socket was closed under us (stop() during a blocking wait)
+				return None
+
+			if offset or eof or not blocking:
+				break
+
+		allData = bytes(buffer[:offset]) if offset else None
+
+		if eof and not offset:
+			# The client closed the connexion without the disconnection marker
+			sock.close()
+			self._logger.info("%s:%d disconnected (connexion closed by peer)", addr[0], addr[1])
+			self._connectedSocket = None
+		elif allData == b"\xff":
 			# The connexion has been closed -> reset
-			self._connectedSocket[0].close()
-			self._logger.info("%s:%d disconnected", self._connectedSocket[1][0], self._connectedSocket[1][1])
+			sock.close()
+			self._logger.info("%s:%d disconnected", addr[0], addr[1])
 			self._connectedSocket = None
 		elif allData:
-			self._receivedData.append(allData)
-			self._logger.debug("received : %s", allData)
+			self._receivedData.put(allData)
+			if self._logger.isEnabledFor(logging.DEBUG):
+				self._logger.debug("received : %r", allData)
 		return allData
 	
 
@@ -237,24 +341,32 @@ class Server(threading.Thread):
 		if not self._connectedSocket:
 			raise socket.error("No client is connected")
 		
-		# Verifying the given parameters
-		if not isinstance(hw, int) or (hw != 0 and hw != 1):
-			self._logger.error("Error while sending command (%d %d %d) : hw has to be 0 or 1.", hw, cmd, info)
-			raise socket.error("hw has to be 0 or 1")
-		if not isinstance(cmd, int) or cmd < 0 or cmd > 7:
-			self._logger.error("Error while sending command (%d %d %d) : cmd has to be an integer between 0 and 7 included.", hw, cmd, info)
-			raise socket.error("cmd has to be an integer between 0 and 7 included")
-		if not isinstance(info, int) or info < 0 or info > 15:
-			self._logger.error("Error while sending command (%d %d %d) : info has to be an integer between 0 and 15 included.", hw, cmd, info)
-			raise socket.error("info has to be an integer between 0 and 15 included")
+		# Verifying the given parameters. The common valid case passes with one
+		# combined mask test ; the detailed checks below only run on failure,
+		# to raise the message naming the offending field
+		try:
+			valid = not ((hw & ~1) | (cmd & ~7) | (info & ~15))
+		except TypeError: # One of the fields is not an integer
+			valid = False
+		if not valid:
+			if not isinstance(hw, int) or (hw != 0 and hw != 1):
+				self._logger.error("Error while sending command (%d %d %d) : hw has to be 0 or 1.", hw, cmd, info)
+				raise socket.error("hw has to be 0 or 1")
+			if not isinstance(cmd, int) or cmd < 0 or cmd > 7:
+				self._logger.error("Error while sending command (%d %d %d) : cmd has to be an integer between 0 and 7 included.", hw, cmd, info)
+				raise socket.error("cmd has to be an integer between 0 and 7 included")
+			if not isinstance(info, int) or info < 0 or info > 15:
+				self._logger.error("Error while sending command (%d %d %d) : info has to be an integer between 0 and 15 included.", hw, cmd, info)
+				raise socket.error("info has to be an integer between 0 and 15 included")
 		
-		# Setting the data to send, pad with 0s to match the buffer size
-		toSend = bytes([(hw << 7) | (cmd << 4) | info]).ljust(self._bufferSize, b'\x00')
+		# Setting the data to send, the zero padding to the buffer size is added
+		# by _sendFrame without building the padded frame in Python
+		header = bytes([(hw << 7) | (cmd << 4) | info])
 
 		# Sending the data
 		try:
 			if __name__ != "__main__":
-				self._connectedSocket[0].sendall(toSend)
+				self._sendFrame(header, self._framePad)
 		except Exception as e:
 			self._logger.error("Error while sending command (%d %d %d): %s", hw, cmd, info, e)
 			raise socket.error(e)
@@ -262,10 +374,23 @@ class Server(threading.Thread):
 			# with data
 			# self._logger.info("Command %s sent", toSend) # in hex
 			# self._logger.info("Command %s sent", "".join([format(byte, '08b') for byte in toSend])) # in bin
-   
+
 			# without data
-			self._logger.info("Command %s sent", toSend[0]) # in hex
-			# self._logger.info("Command %s sent", format(toSend[0], '08b')) # in bin
+			self._logger.info("Command %s sent", header[0]) # in hex
+			# self._logger.info("Command %s sent", format(header[0], '08b')) # in bin
+
+
+	def _sendFrame(self, header: bytes, payload) -> None:
+		"""
+		Sends a frame made of a command header and its payload in one
+		scatter-gather syscall : the kernel assembles the two parts, no
+		Python-level concatenation or padded copy is built.
+		"""
+		sock = self._connectedSocket[0]
+		sent = sock.sendmsg([header, payload])
+		remaining = len(header) + len(payload) - sent
+		if remaining: # Short send (kernel buffer nearly full) : finish the frame
+			sock.sendall((header + bytes(payload))[sent:])
 	
 
 	def sendFile(self, path : str, info : int) -> None:
@@ -284,18 +409,23 @@ class Server(threading.Thread):
 
 		# Sending the file
 		amountOfDataSent = 0
+		# The command byte : 1 (HW + CMD) for the higher 4 bits and the
+		# info (0..7) for the lower 4 bits. Built once for all the chunks
+		header = bytes([(1 << 4) | info])
+		# Reusable chunk buffer : readinto fills it in place, so the loop
+		# allocates nothing per chunk
+		chunk = bytearray(self._bufferSize - 1) # -1 for the command part
+		chunkView = memoryview(chunk)
 		try:
 			with open(path, "rb") as file:
-				readData = file.read(self._bufferSize - 1) # -1 for the command part
-				while readData:
-					# Send the message with the command before.
-					# The function bytes(...) converts the 1 (HW + CMD) for the higher 4 bits
-					# and the info (0..7) for the lower 4 bits into a byte.
-					# Then the data to send is concatenated, and all is sent.
-					self._connectedSocket[0].sendall(bytes([(1 << 4) | info]) + readData)
-					amountOfDataSent += len(readData)
-
-					readData = file.read(self._bufferSize - 1) # -1 for the command part
+				read = file.readinto(chunkView)
+				while read:
+					# Send the chunk with the command before : the kernel
+					# gathers the two parts, no concatenated copy per chunk
+					self._sendFrame(header, chunkView[:read])
+					amountOfDataSent += read
+
+					read = file.readinto(chunkView)
 		except Exception as e:
 			self._logger.error("Error while sending data (still %do sent) : %s", amountOfDataSent, e)
 			raise socket.error(e)
@@ -305,25 +435,40 @@ class Server(threading.Thread):
 
 	def run(self) -> None:
 		self._open()
-		
-		# TODO : Maybe @await ?
+
 		while self._serverOpen: # Server open
-			
+
 			if not self._connectedSocket:
 				# Looking for a connexion
-				self._logger.debug("Looking for a connexion")
+				if self._logger.isEnabledFor(logging.DEBUG):
+					self._logger.debug("Looking for a connexion")
 				if not self._accept():
 					continue
-			
+
 				# Asks the identification to the client
 				if not self.askIdentification():
-					self._connectedSocket[0].close()
-					self._logger.info("The connexion with %s:%d was closed because the client did not match the identification", self._connectedSocket[1][0], self._connectedSocket[1][1])
-					self._connectedSocket = None
+					# The client may already be gone : _receiveData resets the
+					# connexion when it sees the disconnection marker
+					if self._connectedSocket:
+						self._connectedSocket[0].close()
+						self._logger.info("The connexion with %s:%d was closed because the client did not match the identification", self._connectedSocket[1][0], self._connectedSocket[1][1])
+						self._connectedSocket = None
 					continue
-			
-			self._receiveData()
-		
+
+			# Sleep in the kernel (epoll on Linux) until the client sent something,
+			# instead of calling recv in a tight loop that returns EAGAIN : the short
+			# timeout keeps the loop responsive to stop()
+			selector = selectors.DefaultSelector()
+			selector.register(self._connectedSocket[0], selectors.EVENT_READ)
+			while self._serverOpen and self._connectedSocket:
+				try:
+					events = selector.select(timeout=0.2)
+				except OSError:
+					break # The socket was closed by stop() while waiting
+				if events:
+					self._receiveData()
+			selector.close()
+
 		self._logger.info("Server closed")
 
 
@@ -334,6 +479,12 @@ class Server(threading.Thread):
 
 		if self._connectedSocket:
 			self._logger.info("Closing connexion with %s:%i", self._connectedSocket[1][0], self._connectedSocket[1][1])
+			# Shutting down first wakes a receive blocked on this socket in the
+			# server thread ; close alone would leave it waiting
+			try:
+				self._connectedSocket[0].shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass # Already disconnected
 			self._connectedSocket[0].close()
 			self._connectedSocket = None
 
@@ -348,19 +499,35 @@ class Server(threading.Thread):
 
 		self._sendCommand(0, 0, 0) # Identification
 		identification = self._receiveData(blocking=True)
-		
+
+		# The client disconnected before identifying itself
+		if not identification or identification == b"\xff":
+			return False
+
 		# Checks the identification
 		return self.identificationFunction(identification)
 
 	
-	def getReceivedData(self) -> bytes:
+	def getReceivedData(self) -> queue.Queue:
 		"""
-		Returns the list of all the data that has been received.
+		Returns the queue holding all the data that has been received.
 		"""
 
 		return self._receivedData
 
 
+	def getFrame(self, timeout=None) -> bytes:
+		"""
+		Returns the oldest received data, waiting up to timeout seconds for one
+		to arrive. Returns None if nothing arrived in time.
+		"""
+
+		try:
+			return self._receivedData.get(timeout=timeout)
+		except queue.Empty:
+			return None
+
+
 	def getAddress(self) -> tuple:
 		"""
 		Returns the address that the server listens to in the form (adrr, port)
@@ -21,7 +21,9 @@ import threading
 import curses
 
 import os
+from collections import deque
 from datetime import datetime
+from itertools import islice
 
 
 
@@ -68,6 +70,10 @@ ALERT 	= 0b00001000
 SENT 	= 0b00010000
 RECEIVED= 0b00100000
 
+# The flags that affect the curses attribute word (INDENT and UPPER only touch
+# the text). Used to index the precomputed attribute table of the Terminal
+ATTR_MASK = BOLD | ALERT | SENT | RECEIVED
+
 
 
 # ===========================================================================================
@@ -85,8 +91,8 @@ class Terminal(threading.Thread):
 				threadGroup=None,
 				threadTarget=None,
 				threadName=None,
-				threadArgs=list(),
-				threadKwargs=dict(),
+				threadArgs=None,
+				threadKwargs=None,
 				threadDaemon=None,
 				threaded=True,
 				logger=None):
@@ -98,8 +104,10 @@ class Terminal(threading.Thread):
 			# Use the class as non threaded
 			self.start = self.run
 
-		self._args = threadArgs
-		self._kwargs = threadKwargs
+		# None sentinels instead of mutable defaults : a list()/dict() default is
+		# built once at def-time and shared between every instance
+		self._args = tuple(threadArgs) if threadArgs is not None else ()
+		self._kwargs = threadKwargs if threadKwargs is not None else {}
 
 		# Initialization of the logger
 		if logger:
@@ -110,15 +118,56 @@ class Terminal(threading.Thread):
 		# Initialization of the values used for the curses environment
 		self._stdscr = None
 		self._offset = 0
+		self._height = 0 # Screen size, cached and refreshed on KEY_RESIZE only
+		self._width = 0
+
+		# The three panes, created once the screen size is known. Each has its
+		# dirty flag : a pane is only redrawn when its state changed
+		self._headerWin = None
+		self._historyWin = None
+		self._footerWin = None
+		self._headerDirty = True
+		self._historyDirty = True
+		self._inputDirty = True
 
-		self.connectedClient = "" # The id to the client, shown in the header
+		self._connectedClient = "" # The id to the client, shown in the header
+		self._headerText = "" # "Connected: id", rebuilt by the setter only when the client changes
 
 		self._running = False
-		self._input = "" # A string containing the user input
+		self._input = [] 	# The user input, one character per element : inserting or
+							# deleting in the middle does not rebuild the whole string
 		self._cursorXPos = 0 # The horizontal position of the cursor, relatively to the beginning of the self._input string
 
-		self._history = [] 	# A list that contains tuples of the command and the associated data:
-							# Example : [(command1, data1), (command2, data2)]
+		self._history = deque(maxlen=45) 	# Contains tuples of the command and the associated data:
+											# Example : [(command1, data1), (command2, data2)]
+											# The deque evicts the oldest entry by itself, in O(1)
+		self._wrappedLines = deque() 	# The history wrapped for the current width, oldest
+										# first, maintained incrementally by addEntry
+		self._entryLineCounts = deque() # Wrapped lines per history entry, drives eviction
+		self._wrapWidth = 0 # The width the wrapped lines were built for, 0 when stale
+		self._historyLock = threading.Lock() 	# addEntry runs on the program manager thread
+												# while this thread renders : the history and
+												# its wrapped lines only change under the lock
+
+		self._attrTable = [0] * (ATTR_MASK + 1) # Filled by _initializeColors
+		# Attribute words used on every redraw, resolved by _initializeColors
+		self._textAttr = 0
+		self._boldTextAttr = 0
+		self._lineAttr = 0
+
+		# One handler per special key : a dict lookup replaces the comparison
+		# chain, any other key falls through to character insertion
+		self._keyHandlers = {
+			curses.KEY_BACKSPACE: self._handleBackspace,
+			curses.KEY_DC: self._handleDelete,
+			curses.KEY_ENTER: self._handleEnter,
+			10: self._handleEnter, # 10 is the ASCII code for Enter
+			curses.KEY_LEFT: self._handleLeft,
+			curses.KEY_RIGHT: self._handleRight,
+			258: self._handleScroll, # Scrolling
+			259: self._handleScroll,
+			curses.KEY_RESIZE: self._handleResize
+		}
 
 		if (executeCommandFunction):
 			self._executeCommandFunction = executeCommandFunction
@@ -144,6 +193,10 @@ class Terminal(threading.Thread):
 		curses.noecho()
 		curses.cbreak()
 
+		# Do not interrupt a refresh when keys arrive during it : the staged
+		# panes always reach the terminal in one piece
+		curses.typeahead(-1)
+
 		# In keypad mode, escape sequences for special keys
 		# (like the cursor keys) will be interpreted and
 		# a special value like curses.KEY_LEFT will be returned
@@ -174,48 +227,39 @@ class Terminal(threading.Thread):
 		It returns the path to the selected file.
 		"""
 		self._running = True
-		
+
 		# Hide the cursor
 		# curses.curs_set(0)
 
+		# The size only changes on a resize, which curses reports as a key :
+		# no need to ask for it again on every frame
+		self._height, self._width = self._stdscr.getmaxyx()
+		self._createWindows()
+		# Settles the backing screen once, so the first getch does not repaint
+		# the empty stdscr over the panes
+		self._stdscr.noutrefresh()
+
 		# Display before starting the loop
 		self._display()
 
 		while self._running:
-			# Move the cursor
-			self._stdscr.move(curses.LINES - 1, min(curses.COLS - 1, 3 + self._cursorXPos))
+			# Move the cursor, on the input pane
+			self._footerWin.move(1, min(self._width - 1, 3 + self._cursorXPos))
 
-			# Refresh to allow the user to see the cursor
-			self._stdscr.refresh()
+			# One physical update per frame : the panes staged by _display and
+			# the cursor move reach the terminal in a single doupdate burst
+			self._footerWin.noutrefresh()
+			curses.doupdate()
 			
 			# Get the key pressed
 			key = self._stdscr.getch()
 
 			if key != curses.ERR:
-				if key == curses.KEY_BACKSPACE:
-					if self._input and self._cursorXPos > 0:
-						self._input = self._input[:self._cursorXPos-1] + self._input[self._cursorXPos:]
-						self._cursorXPos -= 1
-				elif key == curses.KEY_DC:
-					self._input = self._input[:self._cursorXPos] + self._input[self._cursorXPos+1:]
-				elif key == curses.KEY_ENTER or key == 10:  # 10 is the ASCII code for Enter
-					self._onEnterPress()
-				elif key == curses.KEY_LEFT:
-					if self._cursorXPos > 0:
-						self._cursorXPos -= 1
-				elif key == curses.KEY_RIGHT:
-					if self._cursorXPos < len(self._input):
-						self._cursorXPos += 1
-				elif key == 258 or key == 259: # Scrolling
-					pass
+				handler = self._keyHandlers.get(key)
+				if handler:
+					handler()
 				else:
-					keyChar = chr(key)
-					if keyChar.isprintable():
-						if (self._cursorXPos < len(self._input)):
-							self._input = self._input[:self._cursorXPos] + str(keyChar) + self._input[self._cursorXPos:]
-						else:
-							self._input += str(keyChar)
-						self._cursorXPos += 1
+					self._handleCharacter(key)
 
 			# Global display
 			self._display()
@@ -230,6 +274,52 @@ class Terminal(threading.Thread):
 		curses.endwin()
 	
 
+	def _handleBackspace(self) -> None:
+		if self._input and self._cursorXPos > 0:
+			del self._input[self._cursorXPos-1]
+			self._cursorXPos -= 1
+			self._inputDirty = True
+
+
+	def _handleDelete(self) -> None:
+		if self._cursorXPos < len(self._input):
+			del self._input[self._cursorXPos]
+			self._inputDirty = True
+
+
+	def _handleEnter(self) -> None:
+		self._onEnterPress()
+		self._inputDirty = True
+
+
+	def _handleLeft(self) -> None:
+		if self._cursorXPos > 0:
+			self._cursorXPos -= 1
+
+
+	def _handleRight(self) -> None:
+		if self._cursorXPos < len(self._input):
+			self._cursorXPos += 1
+
+
+	def _handleScroll(self) -> None:
+		pass
+
+
+	def _handleResize(self) -> None:
+		self._height, self._width = self._stdscr.getmaxyx()
+		self._createWindows() # Recreates the panes, marks everything dirty
+
+
+	def _handleCharacter(self, key: int) -> None:
+		# The ASCII range check short-circuits the chr()/isprintable() calls
+		# for ordinary typing
+		if 32 <= key < 127 or (key < 0x110000 and chr(key).isprintable()):
+			self._input.insert(self._cursorXPos, chr(key))
+			self._cursorXPos += 1
+			self._inputDirty = True
+
+
 	def _initializeColors(self) -> None:
 		"""
 		Initializes the colors used in the terminal.
@@ -248,106 +338,196 @@ class Terminal(threading.Thread):
 		COLORS["curses"]["sent"] = curses.color_pair(COLORS["index"]["sent"])
 		COLORS["curses"]["received"] = curses.color_pair(COLORS["index"]["received"])
 		COLORS["curses"]["alert"] = curses.color_pair(COLORS["index"]["alert"])
-		
 
-	def _drawHorizontalLine(self, line: int) -> None:
+		# One attribute word per color-affecting flag combination : the branch
+		# ladder of _displayHistory collapses to a single list indexing per line
+		for flags in range(ATTR_MASK + 1):
+			attr = COLORS["curses"]["text"]
+			if flags & SENT: attr = COLORS["curses"]["sent"]
+			if flags & RECEIVED: attr = COLORS["curses"]["received"]
+			if flags & ALERT: attr = COLORS["curses"]["alert"]
+			if flags & BOLD: attr |= curses.A_BOLD
+			self._attrTable[flags] = attr
+
+		# Resolved once here instead of through two dict subscripts per use
+		self._textAttr = COLORS["curses"]["text"]
+		self._boldTextAttr = self._textAttr | curses.A_BOLD
+		self._lineAttr = curses.ACS_HLINE | self._textAttr
+
+
+	@property
+	def connectedClient(self) -> str:
 		"""
-		Draws an horizontal line at the y line, through the whole screen.
+		The id of the connected client, shown in the header.
 		"""
-		_, maxY = self._stdscr.getmaxyx()
-		for i in range(maxY):
-			self._stdscr.addch(line, i, curses.ACS_HLINE | COLORS["curses"]["text"])
+		return self._connectedClient
+
+
+	@connectedClient.setter
+	def connectedClient(self, value: str) -> None:
+		self._connectedClient = value
+		# Built here once instead of on every redraw
+		self._headerText = "Connected: {}".format(value) if value else ""
+		self._headerDirty = True
+
+
+	def _createWindows(self) -> None:
+		"""
+		(Re)creates the three panes from the cached screen size.
+		Called at startup and after a resize ; marks every pane dirty.
+		"""
+		height, width = self._height, self._width
+		self._headerWin = curses.newwin(2, width, 0, 0)
+		self._historyWin = curses.newwin(height - 4, width, 2, 0)
+		self._footerWin = curses.newwin(2, width, height - 2, 0)
+		# The cursor only ever sits on the input line : the other panes do not
+		# need the physical cursor restored after their refresh
+		self._headerWin.leaveok(True)
+		self._historyWin.leaveok(True)
+		self._headerDirty = True
+		self._historyDirty = True
+		self._inputDirty = True
+
+
+	def _drawHorizontalLine(self, window, line: int) -> None:
+		"""
+		Draws an horizontal line at the y line of the window, through the whole screen.
+		"""
+		window.hline(line, 0, self._lineAttr, self._width)
 
 
 	def _display(self) -> None:
 		"""
-		Displays the lines on the screen, with few additionnal infos like the keys to navigate through the tree.
+		Displays the panes on the screen. Each pane is only redrawn and staged
+		for refresh when its state changed since the last frame : a plain
+		cursor move repaints nothing at all.
 		"""
 
-		self._stdscr.clear()
-		height, width = self._stdscr.getmaxyx()
+		if self._headerDirty:
+			self._headerDirty = False
+			self._displayHeader()
+
+		if self._historyDirty:
+			self._historyDirty = False
+			self._displayHistory()
 
-		# ---------- Header ----------
-		headerLines = 2
-		self._stdscr.attron(curses.A_BOLD)
+		if self._inputDirty:
+			self._inputDirty = False
+			self._displayInput()
+
+
+	def _displayHeader(self) -> None:
+		"""
+		Displays the connexion state, centered, and the line below it.
+		"""
+		win = self._headerWin
+		width = self._width
+		win.erase()
 
-		if self.connectedClient:
-			text = "Connected: {}".format(self.connectedClient)
+		if self._connectedClient:
+			text = self._headerText
 			if len(text) < width-11:
-				self._stdscr.addstr(0, (width - len(text)) // 2, text, COLORS["curses"]["text"] | curses.A_BOLD)
-			elif len(self.connectedClient) < width-11:
+				win.addstr(0, (width - len(text)) // 2, text, self._boldTextAttr)
+			elif len(self._connectedClient) < width-11:
 				# If too large for the screen display only the id
-				self._stdscr.addstr(0, (width - len(self.connectedClient)) // 2, self.connectedClient, COLORS["curses"]["text"] | curses.A_BOLD)
+				win.addstr(0, (width - len(self._connectedClient)) // 2, self._connectedClient, self._boldTextAttr)
 			else:
-				self._stdscr.addstr(0, (width - 9) // 2, "Connected", COLORS["curses"]["text"] | curses.A_BOLD)
+				win.addstr(0, (width - 9) // 2, "Connected", self._boldTextAttr)
 		else:
-			self._stdscr.addstr(0, (width - 13) // 2, "Not connected", COLORS["curses"]["text"] | curses.A_BOLD)
+			win.addstr(0, (width - 13) // 2, "Not connected", self._boldTextAttr)
 
-		self._drawHorizontalLine(1)
+		self._drawHorizontalLine(win, 1)
+		win.noutrefresh()
 
-		# ---------- Footer ----------
-		footerLines = 2
-		self._drawHorizontalLine(height - 2)
+
+	def _displayInput(self) -> None:
+		"""
+		Displays the user input line and the line above it.
+		"""
+		win = self._footerWin
+		width = self._width
+		win.erase()
+
+		self._drawHorizontalLine(win, 0)
 		if (3 + len(self._input) >= width):
-			self._stdscr.addstr(height-1, 0, ">> " + self._input[self._cursorXPos-(width-3-1):self._cursorXPos], COLORS["curses"]["text"])
+			inputText = "".join(self._input[self._cursorXPos-(width-3-1):self._cursorXPos])
 		else:
-			self._stdscr.addstr(height-1, 0, ">> " + self._input, COLORS["curses"]["text"])
-			
-		
-		# ---------- Main ----------
-		availableLines = height - headerLines - footerLines
+			inputText = "".join(self._input)
+		win.addstr(1, 0, ">> " + inputText, self._textAttr)
+		win.noutrefresh()
+
+
+	def _displayHistory(self) -> None:
+		"""
+		Displays the history of the commands and the received data.
+		"""
+		win = self._historyWin
+		height, width = self._height, self._width
+		win.erase()
+
+		availableLines = height - 4 # Header and footer panes
 		# Define the maximum width available for text (considering indentation)
 		maxWidth = width - 5
 
-		linesCount = 0
-		textToDisplay = []
-
-		for command, text, flags in reversed(self._history):
-			if text:
-				# Split text into lines if it exceeds the maximum width
-				lines = reversed([text[i:i+maxWidth] for i in range(0, len(text), maxWidth)])
+		# Everything here runs under the lock : the rebuild iterates the history
+		# and the snapshot iterates the wrapped lines, and a concurrent
+		# addEntry may not mutate either deque meanwhile
+		with self._historyLock:
+			# The wrapped lines are maintained by addEntry as the entries
+			# arrive : a full rebuild only happens when the width changed since
+			# they were built, and a plain redraw does no wrapping at all
+			if self._wrapWidth != maxWidth:
+				self._rebuildWrappedLines(maxWidth)
+
+			# Only the visible tail leaves the deque : the lines above the
+			# pane are never copied
+			if len(self._wrappedLines) > availableLines:
+				textToDisplay = list(islice(reversed(self._wrappedLines), availableLines))[::-1]
+			else:
+				textToDisplay = list(self._wrappedLines)
 
-				for line in lines:
-					textToDisplay.append((line, flags | INDENT))
-					linesCount += 1
-					if linesCount >= availableLines:
-						break
-			
-			if linesCount >= availableLines:
-				break
-			textToDisplay.append((command + ":", flags | BOLD | UPPER))
-			linesCount += 1
-			if linesCount >= availableLines:
-				break
-		
-		textToDisplay.reverse()
-		self._stdscr.move(headerLines, 0)
+		attrTable = self._attrTable
 		for idx, (text, flags) in enumerate(textToDisplay):
-			format = COLORS["curses"]["text"]
-
-			# Configure format depending on the flags
-			if flags & SENT:
-				format = COLORS["curses"]["sent"]
-			if flags & RECEIVED:
-				format = COLORS["curses"]["received"]
-			if flags & ALERT:
-				format = COLORS["curses"]["alert"]
-			if flags & BOLD:
-				format |= curses.A_BOLD
+			# Attribute word precomputed in _initializeColors
+			format = attrTable[flags & ATTR_MASK]
+
 			if flags & INDENT:
 				text = "    " + text
 			if flags & UPPER:
 				text = text.upper()
 
-			# Display the text
-			self._stdscr.addstr(text, format)
+			# One positioned addnstr per line : no newline characters pushed
+			# through curses and the text is clipped to the pane width in C
+			win.addnstr(idx, 0, text, width, format)
+
+		win.noutrefresh()
 
-			# Adds a line break for all line except the last one
-			if idx < len(textToDisplay) - 1:
-				self._stdscr.addch('\n')
 
+	def _wrapEntry(self, command: str, text: str, flags: int, maxWidth: int) -> list:
+		"""
+		Wraps one history entry into its display lines : the title line, then
+		the text split to the maximum width.
+		"""
+		lines = [(command + ":", flags | BOLD | UPPER)]
+		if text:
+			for i in range(0, len(text), maxWidth):
+				lines.append((text[i:i+maxWidth], flags | INDENT))
+		return lines
 
-		self._stdscr.refresh()
+
+	def _rebuildWrappedLines(self, maxWidth: int) -> None:
+		"""
+		Rebuilds the wrapped lines of the whole history for the given width.
+		Only called when the width changed since the last build, with
+		_historyLock held by the caller.
+		"""
+		self._wrappedLines.clear()
+		self._entryLineCounts.clear()
+		for command, text, flags in self._history:
+			lines = self._wrapEntry(command, text, flags, maxWidth)
+			self._wrappedLines.extend(lines)
+			self._entryLineCounts.append(len(lines))
+		self._wrapWidth = maxWidth
 
 
 	def _onEnterPress(self) -> None:
@@ -355,11 +535,11 @@ class Terminal(threading.Thread):
 		Executed when the user presses ENTER
 		"""
 		# Process the command
-		inputList = self._input.split(' ')
+		inputList = "".join(self._input).split(' ')
 
 		while inputList[0] == '': # Entry's first element empty
 			if len(inputList) <= 1: # Empty entry
-					self._input = ""
+					self._input.clear()
 					self._cursorXPos = 0
 					return
 			inputList.pop(0)
@@ -371,7 +551,7 @@ class Terminal(threading.Thread):
 			return
 
 		self._executeCommandFunction(inputList[0], *inputList[1:] if len(inputList) > 1 else ())
-		self._input = ""
+		self._input.clear()
 		self._cursorXPos = 0
 	
 
@@ -380,9 +560,19 @@ class Terminal(threading.Thread):
 		Add the title and text to the historic. Title is displayed in uppercase.
 		Flags can be specified using the constant defined in this module
 		"""
-		self._history.append((title, text, flags))
-		if len(self._history) > 45:
-			self._history.pop(0)
+		with self._historyLock:
+			evicting = len(self._history) == self._history.maxlen
+			self._history.append((title, text, flags))
+			if self._wrapWidth:
+				# Keep the wrapped lines in step : drop the lines of the entry
+				# the full deque just evicted, wrap and append only the new one
+				if evicting:
+					for _ in range(self._entryLineCounts.popleft()):
+						self._wrappedLines.popleft()
+				lines = self._wrapEntry(title, text, flags, self._wrapWidth)
+				self._wrappedLines.extend(lines)
+				self._entryLineCounts.append(len(lines))
+		self._historyDirty = True
 
 
 	def stop(self) -> None:
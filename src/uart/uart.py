@@ -1,11 +1,17 @@
 import serial
-import os, sys, signal
+import os, re, sys, signal
 
 
 
 FILE_NAME_WITHOUT_IDX = "uart"
 FILE_EXT = ".bin"
 FILE_OPEN_MODE = "wb"
+WRITE_BATCH_SIZE = 65536 # Bytes accumulated before flushing to the file
+WRITE_BATCH_CHUNKS = 1024 # writev iovec limit (IOV_MAX on Linux)
+
+# Matches the files this receiver generates, capturing their index. Built from
+# the name constants so the scan always agrees with the names being written
+FILE_NAME_RE = re.compile(re.escape(FILE_NAME_WITHOUT_IDX) + r"(\d+)" + re.escape(FILE_EXT))
 
 class UARTReceiver:
 	"""
@@ -18,6 +24,8 @@ class UARTReceiver:
 
 		self._dirPath = dirPath
 		self._file = None
+		self._pendingWrites = [] # Chunks waiting for the next writev flush
+		self._pendingSize = 0
 
 		self._serialCom = serial.Serial()
 		self._serialCom.baudrate = baudrate
@@ -31,25 +39,16 @@ class UARTReceiver:
 
 		print("start of the receiver")
 
-		# get the new file name
-		files = os.listdir(self._dirPath)
-		
-		fileIndex = -1
-		for fileName in files:
-			if fileName.startswith(FILE_NAME_WITHOUT_IDX) and fileName.endswith(FILE_EXT):
-				try:
-					# extract the integer value of from the file name
-					i = int(fileName.split("_")[1].split(".")[0])
-					if  i > fileIndex: fileIndex = i
-				# skip files with invalid values
-				except ValueError:
-					pass
-				except IndexError:
-					pass
-		fileIndex += 1
+		# get the new file name : one C-level regex match per directory entry
+		# extracts the index, invalid names simply do not match
+		fileIndex = max(
+			(int(m.group(1)) for m in map(FILE_NAME_RE.fullmatch, os.listdir(self._dirPath)) if m),
+			default=-1
+		) + 1
 		fileName = FILE_NAME_WITHOUT_IDX + str(fileIndex) + FILE_EXT
 
-		self._file = open(os.path.join(self._dirPath, fileName), FILE_OPEN_MODE)
+		# Unbuffered : all the writes go through the writev flush below
+		self._file = open(os.path.join(self._dirPath, fileName), FILE_OPEN_MODE, buffering=0)
 		print("file opened :", fileName)
 
 		self._running = True
@@ -62,6 +61,7 @@ class UARTReceiver:
 		Stops the receiver.
 		"""
 		self._running = False
+		self._flushPending()
 		self._file.close()
 		self._serialCom.close()
 		print("file closed")
@@ -75,13 +75,29 @@ class UARTReceiver:
 
 		while self._running:
 			try:
-				received = self._serialCom.read()
-				print(received)
-				self._file.write(received)
+				# Read everything already buffered in one call, waiting for at
+				# least one byte : one syscall per burst instead of one per byte
+				received = self._serialCom.read(self._serialCom.in_waiting or 1)
+				# Collect the chunks and write them all at once in a single
+				# scatter-gather syscall, see _flushPending
+				self._pendingWrites.append(received)
+				self._pendingSize += len(received)
+				if self._pendingSize >= WRITE_BATCH_SIZE or len(self._pendingWrites) >= WRITE_BATCH_CHUNKS:
+					self._flushPending()
 			except OSError:
 				pass
 
 
+	def _flushPending(self) -> None:
+		"""
+		Writes the accumulated chunks to the file with one writev syscall.
+		"""
+		if self._pendingWrites:
+			os.writev(self._file.fileno(), self._pendingWrites)
+			self._pendingWrites.clear()
+			self._pendingSize = 0
+
+
 
 
 if __name__ == "__main__":